@@ -1,17 +1,31 @@
 import streamlit as st
-from datetime import datetime
+from renewals_data import load_renewals_book, refresh_renewals_book, warm_up_chart_libraries
+
+def display_data_refresh(status_col, button_col):
+    """
+    Show the renewals book's watermark and totals, with the button that
+    applies the latest changes from the change feed
+    """
+    book = load_renewals_book()
+    with button_col:
+        if st.button("🔄 Fetch Latest Data"):
+            with st.spinner('Fetching latest renewals data...'):
+                changed = refresh_renewals_book(book)
+            if changed:
+                st.success(f'{changed} policy changes applied!')
+            else:
+                st.success('Data is already up to date!')
+    with status_col:
+        st.markdown(f"*Last updated: {book['watermark'].strftime('%d %b %Y %H:%M')}*")
+        totals = book['aggregates'][['Count', 'Premium']].sum()
+        st.markdown(f"*{totals['Count']:,.0f} renewals in book, £{totals['Premium']:,.0f} premium*")
 
 def run_landing_page():
     st.title("Welcome to Renewals Assistant")
-    # Data refresh section
+    # Data refresh section. Its place is reserved here but it is filled in
+    # last, so the static content paints before the renewals book and
+    # pandas are loaded.
     refresh_col1, refresh_col2 = st.columns([3, 1])
-    with refresh_col1:
-        st.markdown(f"*Last updated: {datetime.now().strftime('%d %b %Y %H:%M')}*")
-    with refresh_col2:
-        if st.button("🔄 Fetch Latest Data"):
-            with st.spinner('Fetching latest renewals data...'):
-                # Here you would typically call your data refresh function
-                st.success('Data refreshed successfully!')
 
     # Priority actions
     st.header("⚡ Priority Actions")
@@ -59,5 +73,8 @@ def run_landing_page():
     with col3:
         st.button("Set Terms")
 
+    warm_up_chart_libraries()
+    display_data_refresh(refresh_col1, refresh_col2)
+
 if __name__ == "__main__":
     run_landing_page()
\ No newline at end of file
@@ -1,21 +1,18 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
+from renewals_data import load_renewals_book, triage_contributions, warm_up_chart_libraries
 
-import streamlit as st
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-
-# handling plotly in cases where it's not intalled
-try:
-    import plotly.express as px
-    import plotly.graph_objs as go
-    plotly_available = True
-except ImportError:
-    st.warning("Plotly is not installed. Some visualizations may not display correctly.")
-    plotly_available = False
+def load_plotly():
+    """
+    Import plotly lazily so it is only paid for when a chart is actually drawn.
+    Returns None when plotly is not installed.
+    """
+    try:
+        import plotly.express as px
+    except ImportError:
+        return None
+    return px
 
 def filter_dataframe(df, time_period, line_of_business, broker, sort_by):
     """
@@ -59,6 +56,24 @@ def filter_dataframe(df, time_period, line_of_business, broker, sort_by):
     
     return filtered_df
 
+def summarise_triage(aggregates, line_of_business, broker):
+    """
+    Headline triage metrics from per line of business/broker/priority aggregates
+    """
+    selected = aggregates
+    if line_of_business != "All":
+        selected = selected[selected.index.get_level_values('Line_of_Business') == line_of_business]
+    if broker != "All":
+        selected = selected[selected.index.get_level_values('Broker') == broker]
+
+    total_renewals = selected['Count'].sum()
+    return {
+        'total_renewals': total_renewals,
+        'total_premium': selected['Premium'].sum(),
+        'avg_rate_change': selected['Rate_Change'].sum() / total_renewals if total_renewals else float('nan'),
+        'high_priority': selected.loc[selected.index.get_level_values('Priority') == 'High', 'Count'].sum()
+    }
+
 def create_renewals_insights_charts(filtered_df):
     """
     Create visualizations for renewals insights
@@ -66,7 +81,8 @@ def create_renewals_insights_charts(filtered_df):
     # Create two columns for charts
     chart_col1, chart_col2 = st.columns(2)
 
-    if plotly_available:
+    px = load_plotly()
+    if px is not None:
         # Chart 1: Risk Score vs Premium Scatter Plot
         with chart_col1:
             st.subheader("Risk Score vs Premium")
@@ -97,6 +113,7 @@ def create_renewals_insights_charts(filtered_df):
             st.plotly_chart(fig2, use_container_width=True)
     else:
         # Fallback visualizations using Streamlit's native charts
+        st.warning("Plotly is not installed. Some visualizations may not display correctly.")
         with chart_col1:
             st.subheader("Risk Score vs Premium")
             st.scatter_chart(
@@ -113,58 +130,48 @@ def create_renewals_insights_charts(filtered_df):
             st.bar_chart(lob_summary, x='Line_of_Business', y='Rate_Change')
 
 def run_triage_view():
+    warm_up_chart_libraries()
+
     st.title("Renewals Triage")
 
-    # Generate sample data with more comprehensive information
-    data = {
-        'Policy_Ref': ['POL001', 'POL002', 'POL003', 'POL004', 'POL005', 'POL006', 'POL007', 'POL008', 'POL009'],
-        'Insured': ['ABC Corp', 'XYZ Ltd', 'Tech Inc', 'Global Enterprises', 'Innovative Solutions', 
-                    'Energy Partners', 'Financial Services', 'Manufacturing Co', 'Retail Giant'],
-        'Expiry_Date': [
-            (datetime.now() + timedelta(days=x)).strftime('%Y-%m-%d') 
-            for x in [30, 45, 60, 20, 75, 90, 40, 55, 85]
-        ],
-        'Premium': [1000000, 2500000, 500000, 3000000, 1500000, 4000000, 2000000, 1800000, 3500000],
-        'Claims_Ratio': [0.65, 0.40, 0.85, 0.55, 0.75, 0.30, 0.60, 0.45, 0.50],
-        'Rate_Change': [0.05, 0.08, -0.02, 0.06, 0.03, 0.10, 0.04, 0.07, 0.05],
-        'Risk_Score': [85, 72, 45, 90, 60, 95, 80, 70, 88],
-        'Priority': ['High', 'Medium', 'Low', 'High', 'Medium', 'High', 'Medium', 'Low', 'High'],
-        'Line_of_Business': ['Property', 'Casualty', 'Marine', 'Energy', 'Property', 'Energy', 
-                             'Casualty', 'Marine', 'Property'],
-        'Broker': ['Aon', 'WTW', 'Marsh', 'Other', 'Aon', 'WTW', 'Marsh', 'Other', 'Aon']
-    }
-    df = pd.DataFrame(data)
+    # Shared renewals book and its pre-computed triage aggregates
+    book = load_renewals_book()
+    df = book['policies'].reset_index()
+    aggregates = book['aggregates']
 
     # Filters row
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         time_period = st.selectbox("Time Period", ["Next 30 days", "30-60 days", "60-90 days", "All"])
     with col2:
-        line_of_business = st.selectbox("Line of Business", ["All", "Property", "Casualty", "Marine", "Energy"])
+        line_of_business = st.selectbox(
+            "Line of Business", ["All"] + sorted(aggregates.index.unique('Line_of_Business'))
+        )
     with col3:
-        broker = st.selectbox("Broker", ["All", "Aon", "WTW", "Marsh", "Other"])
+        broker = st.selectbox("Broker", ["All"] + sorted(aggregates.index.unique('Broker')))
     with col4:
         sort_by = st.selectbox("Sort by", ["Risk Score", "Premium Size", "Expiry Date"])
 
     # Apply filters and sorting
     filtered_df = filter_dataframe(df, time_period, line_of_business, broker, sort_by)
 
-    # Calculate dynamic metrics
-    total_renewals = len(filtered_df)
-    total_premium = filtered_df['Premium'].sum()
-    avg_rate_change = filtered_df['Rate_Change'].mean()
-    high_priority = filtered_df[filtered_df['Priority'] == 'High'].shape[0]
+    # Calculate dynamic metrics. Without a time filter they come straight from
+    # the book's aggregates instead of scanning the filtered policies.
+    if time_period == "All":
+        metrics = summarise_triage(aggregates, line_of_business, broker)
+    else:
+        metrics = summarise_triage(triage_contributions(filtered_df), line_of_business, broker)
 
     # Key metrics row
     metrics_cols = st.columns(4)
     with metrics_cols[0]:
-        st.metric("Total Renewals", f"{total_renewals}")
+        st.metric("Total Renewals", f"{metrics['total_renewals']:,.0f}")
     with metrics_cols[1]:
-        st.metric("Total Premium", f"£{total_premium:,.0f}")
+        st.metric("Total Premium", f"£{metrics['total_premium']:,.0f}")
     with metrics_cols[2]:
-        st.metric("Avg Rate Change", f"{avg_rate_change:+.1%}")
+        st.metric("Avg Rate Change", f"{metrics['avg_rate_change']:+.1%}")
     with metrics_cols[3]:
-        st.metric("High Priority", f"{high_priority}")
+        st.metric("High Priority", f"{metrics['high_priority']:,.0f}")
 
     # Create insights charts
     create_renewals_insights_charts(filtered_df)
@@ -176,7 +183,7 @@ def run_triage_view():
             'Claims_Ratio': '{:.1%}',
             'Rate_Change': '{:+.1%}',
             'Risk_Score': '{:.0f}'
-        }).applymap(
+        }).map(
             lambda x: 'background-color: #ffcccc' if x == 'High' 
             else ('background-color: #ffffcc' if x == 'Medium' 
             else 'background-color: #ccffcc'),
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from renewals_data import warm_up_chart_libraries
 
 def load_policy_data():
     """
@@ -10,6 +11,8 @@ def load_policy_data():
         {
             "Policy_Ref": "POL-001",
             "Client_Name": "ABC Corp",
+            "Industry_Sector": "Professional Services",
+            "Territory": "UK",
             "Current_Premium": 1000000,
             "Claims_Ratio": 0.65,
             "Technical_Rate_Change": 0.125,
@@ -19,7 +22,8 @@ def load_policy_data():
             "Exposure_Changes": {
                 "Revenue_Change": 0.15,
                 "New_Territories": 2,
-                "Products_Change": "No change"
+                "Products_Change": "No change",
+                "Emerging_Market_Share": 0.00
             },
             "Claims_Development": {
                 "New_Claims": 2,
@@ -29,16 +33,15 @@ def load_policy_data():
             "Risk_Profile": {
                 "Risk_Score_Change": 10,
                 "Cat_Exposure_Change": -0.05,
-                "Risk_Controls": "Improved"
-            },
-            "Risk_Appetite": {
-                "Within": ["Premium size", "Territory", "Industry sector"],
-                "Outside": ["Claims ratio trending up", "Accumulation in key zone"]
+                "Risk_Controls": "Improved",
+                "Key_Zone_Accumulation": 0.92
             }
         },
         {
             "Policy_Ref": "POL-002",
             "Client_Name": "XYZ Manufacturing",
+            "Industry_Sector": "Manufacturing",
+            "Territory": "Europe",
             "Current_Premium": 1500000,
             "Claims_Ratio": 0.55,
             "Technical_Rate_Change": 0.10,
@@ -48,7 +51,8 @@ def load_policy_data():
             "Exposure_Changes": {
                 "Revenue_Change": 0.10,
                 "New_Territories": 1,
-                "Products_Change": "+1 new product line"
+                "Products_Change": "+1 new product line",
+                "Emerging_Market_Share": 0.15
             },
             "Claims_Development": {
                 "New_Claims": 1,
@@ -58,16 +62,15 @@ def load_policy_data():
             "Risk_Profile": {
                 "Risk_Score_Change": 5,
                 "Cat_Exposure_Change": -0.03,
-                "Risk_Controls": "Stable"
-            },
-            "Risk_Appetite": {
-                "Within": ["Premium size", "Territory", "Industry sector", "Claims ratio"],
-                "Outside": ["Emerging market exposure"]
+                "Risk_Controls": "Stable",
+                "Key_Zone_Accumulation": 0.40
             }
         },
         {
             "Policy_Ref": "POL-003",
             "Client_Name": "Global Energy Solutions",
+            "Industry_Sector": "Energy",
+            "Territory": "North America",
             "Current_Premium": 2000000,
             "Claims_Ratio": 0.70,
             "Technical_Rate_Change": 0.15,
@@ -77,7 +80,8 @@ def load_policy_data():
             "Exposure_Changes": {
                 "Revenue_Change": 0.20,
                 "New_Territories": 3,
-                "Products_Change": "+2 new product lines"
+                "Products_Change": "+2 new product lines",
+                "Emerging_Market_Share": 0.05
             },
             "Claims_Development": {
                 "New_Claims": 3,
@@ -87,17 +91,151 @@ def load_policy_data():
             "Risk_Profile": {
                 "Risk_Score_Change": 15,
                 "Cat_Exposure_Change": 0.02,
-                "Risk_Controls": "Needs improvement"
-            },
-            "Risk_Appetite": {
-                "Within": ["Premium size"],
-                "Outside": ["Claims ratio", "Risk score", "Cat exposure"]
+                "Risk_Controls": "Needs improvement",
+                "Key_Zone_Accumulation": 0.60
             }
         }
     ]
     return pd.DataFrame(policies)
 
-def display_policy_details(policy):
+# Declarative risk appetite rules. Each rule names a policy field (nested
+# fields use "Parent.Child") and the condition for being within appetite.
+APPETITE_RULES = [
+    {"name": "Premium size", "field": "Current_Premium", "op": "between", "value": (250000, 2500000)},
+    {"name": "Territory", "field": "Territory", "op": "in", "value": ("UK", "Europe", "North America")},
+    {"name": "Industry sector", "field": "Industry_Sector", "op": "in",
+     "value": ("Professional Services", "Manufacturing", "Energy")},
+    {"name": "Claims ratio", "field": "Claims_Ratio", "op": "<=", "value": 0.60},
+    {"name": "Risk score", "field": "Risk_Score", "op": "<=", "value": 85},
+    {"name": "Cat exposure", "field": "Risk_Profile.Cat_Exposure_Change", "op": "<=", "value": 0.0},
+    {"name": "Emerging market exposure", "field": "Exposure_Changes.Emerging_Market_Share", "op": "<=", "value": 0.10},
+    {"name": "Accumulation in key zone", "field": "Risk_Profile.Key_Zone_Accumulation", "op": "<=", "value": 0.80}
+]
+
+# Rule backing the "Above Risk Threshold" bulk filter
+RISK_THRESHOLD_RULE = "Risk score"
+
+def _field_values(policies_df, field):
+    """
+    Extract a (possibly nested) rule field from the policies as a column
+    """
+    parent, _, child = field.partition(".")
+    if child:
+        return policies_df[parent].str.get(child)
+    return policies_df[parent]
+
+def compile_appetite_rule(rule):
+    """
+    Compile a single appetite rule into a vectorized predicate over the policies
+    """
+    field, op, value = rule["field"], rule["op"], rule["value"]
+    if op == "between":
+        low, high = value
+        return lambda df: _field_values(df, field).between(low, high).to_numpy()
+    if op == "in":
+        return lambda df: _field_values(df, field).isin(value).to_numpy()
+    comparisons = {
+        "<": np.less,
+        "<=": np.less_equal,
+        ">": np.greater,
+        ">=": np.greater_equal,
+        "==": np.equal,
+        "!=": np.not_equal
+    }
+    if op not in comparisons:
+        raise ValueError(f"Unsupported appetite rule operator '{op}' in rule '{rule['name']}'")
+    compare = comparisons[op]
+    return lambda df: compare(_field_values(df, field).to_numpy(), value)
+
+@st.cache_resource
+def compile_appetite_rules(rules):
+    """
+    Compile the full rule set once into a name -> predicate mapping
+    """
+    return {rule["name"]: compile_appetite_rule(rule) for rule in rules}
+
+def evaluate_risk_appetite(policies_df, compiled_rules):
+    """
+    Evaluate every rule across the whole book. Returns a boolean matrix with
+    one row per policy and one column per rule (True = within appetite).
+    """
+    return pd.DataFrame(
+        {name: predicate(policies_df) for name, predicate in compiled_rules.items()},
+        index=policies_df['Policy_Ref']
+    )
+
+# Policies hold nested dicts, which pandas can't hash directly
+@st.cache_data(hash_funcs={pd.DataFrame: lambda df: df.to_json()})
+def load_risk_appetite(policies_df, rules):
+    """
+    Appetite matrix for the book under a rule set, evaluated in full
+    """
+    return evaluate_risk_appetite(policies_df, compile_appetite_rules(rules))
+
+def refresh_risk_appetite(appetite_matrix, policies_df, old_rules, new_rules):
+    """
+    Re-evaluate only the rules that were added or changed between two rule
+    sets, dropping columns for rules that no longer exist
+    """
+    old_by_name = {rule["name"]: rule for rule in old_rules}
+    new_names = [rule["name"] for rule in new_rules]
+    refreshed = appetite_matrix.drop(
+        columns=[name for name in appetite_matrix.columns if name not in new_names]
+    )
+    for rule in new_rules:
+        if old_by_name.get(rule["name"]) != rule:
+            refreshed[rule["name"]] = compile_appetite_rule(rule)(policies_df)
+    return refreshed[new_names]
+
+def appetite_breakdown(appetite_matrix, policy_ref):
+    """
+    Split a policy's row of the appetite matrix into within/outside rule names
+    """
+    row = appetite_matrix.loc[policy_ref].to_numpy(dtype=bool)
+    return {
+        "Within": list(appetite_matrix.columns[row]),
+        "Outside": list(appetite_matrix.columns[~row])
+    }
+
+def edit_appetite_rules(rules, policies_df):
+    """
+    Let the underwriter adjust each rule's threshold, returning the edited rule set
+    """
+    edited_rules = []
+    for rule in rules:
+        key = f"appetite_rule_{rule['name']}"
+        if rule["op"] == "between":
+            low_col, high_col = st.columns(2)
+            with low_col:
+                low = st.number_input(f"{rule['name']} (min)", value=rule["value"][0], key=f"{key}_min")
+            with high_col:
+                high = st.number_input(f"{rule['name']} (max)", value=rule["value"][1], key=f"{key}_max")
+            value = (low, high)
+        elif rule["op"] == "in":
+            options = sorted(set(_field_values(policies_df, rule["field"])) | set(rule["value"]))
+            value = tuple(st.multiselect(rule["name"], options, default=list(rule["value"]), key=key))
+        else:
+            value = st.number_input(f"{rule['name']} ({rule['op']})", value=rule["value"], key=key)
+        edited_rules.append({**rule, "value": value})
+    return edited_rules
+
+def apply_bulk_decision(policies_df, bulk_decision, bulk_filter, appetite_matrix, decisions):
+    """
+    Record a renewal decision for every policy matching the bulk filters.
+    Returns the number of policies it was applied to.
+    """
+    mask = np.ones(len(policies_df), dtype=bool)
+    impacts = [f.replace(" Impact", "") for f in bulk_filter if f.endswith(" Impact")]
+    if impacts:
+        mask &= policies_df['Portfolio_Impact'].isin(impacts).to_numpy()
+    if "Above Risk Threshold" in bulk_filter:
+        mask &= ~appetite_matrix.loc[policies_df['Policy_Ref'], RISK_THRESHOLD_RULE].to_numpy()
+
+    for policy_ref in policies_df.loc[mask, 'Policy_Ref']:
+        decisions[policy_ref] = bulk_decision
+    return int(mask.sum())
+
+def display_policy_details(policy, appetite, decisions):
     """
     Display detailed information for a selected policy
     """
@@ -141,12 +279,12 @@ def display_policy_details(policy):
     
     with appetite_cols[0]:
         st.markdown("**Within Appetite**")
-        for item in policy['Risk_Appetite']['Within']:
+        for item in appetite['Within']:
             st.markdown(f"✅ {item}")
         
     with appetite_cols[1]:
         st.markdown("**Outside Appetite**")
-        for item in policy['Risk_Appetite']['Outside']:
+        for item in appetite['Outside']:
             st.markdown(f"❌ {item}")
 
     # Decision and Comments
@@ -154,9 +292,12 @@ def display_policy_details(policy):
     col1, col2 = st.columns(2)
     
     with col1:
+        decision_options = ["Pursue - Standard Terms", "Pursue - Modified Terms", "Decline"]
+        saved_decision = decisions.get(policy['Policy_Ref'])
         decision = st.radio(
             "Renewal Decision",
-            ["Pursue - Standard Terms", "Pursue - Modified Terms", "Decline"],
+            decision_options,
+            index=decision_options.index(saved_decision) if saved_decision in decision_options else 0,
             key=f"decision_{policy['Policy_Ref']}"
         )
         
@@ -170,19 +311,39 @@ def display_policy_details(policy):
     # Action Buttons
     action_cols = st.columns(3)
     with action_cols[0]:
-        st.button("Save Decision", key=f"save_{policy['Policy_Ref']}")
+        if st.button("Save Decision", key=f"save_{policy['Policy_Ref']}"):
+            decisions[policy['Policy_Ref']] = decision
+            st.success("Decision saved!")
     with action_cols[1]:
         st.button("Generate Referral", key=f"referral_{policy['Policy_Ref']}")
     with action_cols[2]:
         st.button("Proceed to Terms", key=f"terms_{policy['Policy_Ref']}")
 
 def run_assessment_view():
+    warm_up_chart_libraries()
+
     # Load policy data
     policies_df = load_policy_data()
 
     # Main page title
     st.title("Renewal Assessment")
 
+    # Risk appetite across the whole book. The matrix is kept between reruns
+    # and a rule edit only re-evaluates the rules that changed.
+    with st.expander("Risk Appetite Rules"):
+        rules = edit_appetite_rules(APPETITE_RULES, policies_df)
+    appetite_matrix = st.session_state.get('appetite_matrix')
+    previous_rules = st.session_state.get('appetite_rules')
+    if appetite_matrix is None or not appetite_matrix.index.equals(pd.Index(policies_df['Policy_Ref'])):
+        appetite_matrix = load_risk_appetite(policies_df, rules)
+    elif rules != previous_rules:
+        appetite_matrix = refresh_risk_appetite(appetite_matrix, policies_df, previous_rules, rules)
+    st.session_state['appetite_matrix'] = appetite_matrix
+    st.session_state['appetite_rules'] = rules
+
+    # Renewal decisions made so far, kept across reruns
+    decisions = st.session_state.setdefault('renewal_decisions', {})
+
     # Bulk Action Section
     st.subheader("Bulk Actions")
     bulk_cols = st.columns(3)
@@ -200,8 +361,11 @@ def run_assessment_view():
         if st.button("Apply to All"):
             if bulk_decision != "No Bulk Action":
                 # Apply bulk decision
-                policies_df = apply_bulk_decision(policies_df, bulk_decision, bulk_filter)
-                st.success(f"Bulk action '{bulk_decision}' applied to selected policies!")
+                applied = apply_bulk_decision(policies_df, bulk_decision, bulk_filter, appetite_matrix, decisions)
+                if applied:
+                    st.success(f"Bulk action '{bulk_decision}' applied to {applied} {'policy' if applied == 1 else 'policies'}!")
+                else:
+                    st.warning("No policies match the selected filters.")
             else:
                 st.warning("Please select a bulk action first.")
 
@@ -225,11 +389,12 @@ def run_assessment_view():
             
             # Expandable section for each policy
             with st.expander(f"{policy_display}"):
-                display_policy_details(policy)
+                display_policy_details(policy, appetite_breakdown(appetite_matrix, policy_ref), decisions)
 
     # Optional: Policy Summary Table
     st.subheader("Policy Overview")
     overview_df = policies_df[['Policy_Ref', 'Client_Name', 'Current_Premium', 'Risk_Score', 'Portfolio_Impact']]
+    overview_df['Decision'] = overview_df['Policy_Ref'].map(decisions).fillna("Pending")
     overview_df['Current_Premium'] = overview_df['Current_Premium'].apply(lambda x: f"£{x:,}")
     st.dataframe(overview_df, use_container_width=True)
 
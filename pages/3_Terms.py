@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from renewals_data import warm_up_chart_libraries
 
 def load_terms_data():
     """
@@ -11,6 +12,7 @@ def load_terms_data():
             {
                 'Policy_Ref': 'POL-001',
                 'Client_Name': 'ABC Corp',
+                'Line_of_Business': 'Property',
                 'Technical_Premium': 1125000,
                 'Market_Premium': 1080000,
                 'Recommended_Premium': 1100000,
@@ -37,6 +39,7 @@ def load_terms_data():
                 },
                 'Capacity': {
                     'Line_Size': 0.65,
+                    'Signed_Share': 0.25,
                     'Aggregate_Exposure': 0.45
                 },
                 'Risk_Factors': {
@@ -48,6 +51,7 @@ def load_terms_data():
             {
                 'Policy_Ref': 'POL-002',
                 'Client_Name': 'XYZ Manufacturing',
+                'Line_of_Business': 'Casualty',
                 'Technical_Premium': 1250000,
                 'Market_Premium': 1200000,
                 'Recommended_Premium': 1225000,
@@ -74,6 +78,7 @@ def load_terms_data():
                 },
                 'Capacity': {
                     'Line_Size': 0.70,
+                    'Signed_Share': 0.20,
                     'Aggregate_Exposure': 0.50
                 },
                 'Risk_Factors': {
@@ -85,6 +90,170 @@ def load_terms_data():
         ]
     }
 
+TERM_NAMES = ['Premium', 'Deductible', 'Limit']
+SCENARIO_ACTIONS = ['Change by %', 'Set to Model', 'Set to Market', 'Set to Expiring']
+
+def build_terms_table(terms_data):
+    """
+    Flatten the terms of every policy into one portfolio table,
+    with one row per policy and term
+    """
+    rows = []
+    for policy in terms_data['policies']:
+        for term in TERM_NAMES:
+            rows.append({
+                'Policy_Ref': policy['Policy_Ref'],
+                'Line_of_Business': policy['Line_of_Business'],
+                'Term': term,
+                'Signed_Share': policy['Capacity']['Signed_Share'],
+                **policy['Terms'][term]
+            })
+    return pd.DataFrame(rows)
+
+def apply_adjustments(terms_table, adjustments, diff=None):
+    """
+    Apply scenario adjustments to the Proposed column as vectorized transforms.
+    A scenario is stored as a diff over the base table: the Proposed values of
+    the rows it changes. Passing an existing diff applies the adjustments on
+    top of it instead of starting again from the base.
+    """
+    base_proposed = terms_table['Proposed'].to_numpy(dtype=float)
+    proposed = base_proposed.copy()
+    if diff is not None:
+        proposed[terms_table.index.get_indexer(diff.index)] = diff.to_numpy()
+
+    for adjustment in adjustments:
+        mask = terms_table['Term'] == adjustment['term']
+        if adjustment['line_of_business'] != 'All':
+            mask &= terms_table['Line_of_Business'] == adjustment['line_of_business']
+        mask = mask.to_numpy()
+
+        if adjustment['action'] == 'Change by %':
+            proposed = np.where(mask, proposed * (1 + adjustment['value']), proposed)
+        elif adjustment['action'] in SCENARIO_ACTIONS:
+            source = adjustment['action'].replace('Set to ', '')
+            proposed = np.where(mask, terms_table[source].to_numpy(dtype=float), proposed)
+        else:
+            raise ValueError(f"Unsupported scenario adjustment '{adjustment['action']}'")
+
+    changed = proposed != base_proposed
+    return pd.Series(proposed[changed], index=terms_table.index[changed])
+
+def summarise_terms(terms_table):
+    """
+    Portfolio totals for the base terms. Line exposure is our signed share
+    of each policy's limit, summed across the portfolio.
+    """
+    premium_rows = terms_table['Term'] == 'Premium'
+    limit_rows = terms_table['Term'] == 'Limit'
+    return {
+        'Total_Premium': terms_table.loc[premium_rows, 'Proposed'].sum(),
+        'Model_Premium': terms_table.loc[premium_rows, 'Model'].sum(),
+        'Line_Exposure': (
+            terms_table.loc[limit_rows, 'Proposed'] * terms_table.loc[limit_rows, 'Signed_Share']
+        ).sum()
+    }
+
+def summarise_scenario(terms_table, base_summary, diff):
+    """
+    Portfolio totals for a scenario, updated from the base totals using
+    only the rows in the scenario's diff
+    """
+    changed = terms_table.loc[diff.index]
+    delta = diff - changed['Proposed']
+    premium_rows = changed['Term'] == 'Premium'
+    limit_rows = changed['Term'] == 'Limit'
+    return {
+        'Total_Premium': base_summary['Total_Premium'] + delta[premium_rows].sum(),
+        'Model_Premium': base_summary['Model_Premium'],
+        'Line_Exposure': base_summary['Line_Exposure'] + (
+            delta[limit_rows] * changed.loc[limit_rows, 'Signed_Share']
+        ).sum()
+    }
+
+def compare_scenarios(base_summary, scenarios):
+    """
+    Build the scenario comparison table from the stored scenario totals
+    """
+    summaries = {'Base': base_summary}
+    summaries.update({name: scenario['summary'] for name, scenario in scenarios.items()})
+    comparison = pd.DataFrame.from_dict(summaries, orient='index')
+    comparison['Premium_Change'] = comparison['Total_Premium'] / base_summary['Total_Premium'] - 1
+    comparison['Rate_Adequacy'] = comparison['Total_Premium'] / comparison['Model_Premium']
+    return comparison[['Total_Premium', 'Premium_Change', 'Rate_Adequacy', 'Line_Exposure']]
+
+def display_portfolio_scenarios(terms_data):
+    """
+    Build named what-if scenarios over the whole portfolio and compare them
+    """
+    st.subheader("Portfolio Scenarios")
+    terms_table = build_terms_table(terms_data)
+    base_summary = summarise_terms(terms_table)
+    scenarios = st.session_state.setdefault('terms_scenarios', {})
+    st.caption(
+        "Adjustments added under an existing scenario name are applied on top of "
+        "that scenario's earlier ones. Remove a scenario to start it again."
+    )
+
+    scenario_cols = st.columns(5)
+    with scenario_cols[0]:
+        scenario_name = st.text_input("Scenario Name")
+    with scenario_cols[1]:
+        scenario_term = st.selectbox("Term", TERM_NAMES)
+    with scenario_cols[2]:
+        scenario_lob = st.selectbox(
+            "Line of Business",
+            ["All"] + sorted(terms_table['Line_of_Business'].unique()),
+            key="scenario_lob"
+        )
+    with scenario_cols[3]:
+        scenario_action = st.selectbox("Adjustment", SCENARIO_ACTIONS)
+    with scenario_cols[4]:
+        scenario_value = st.number_input(
+            "Change (%)",
+            value=5.0,
+            step=1.0,
+            disabled=scenario_action != 'Change by %'
+        )
+
+    if st.button("Add to Scenario"):
+        if scenario_name:
+            adjustment = {
+                'term': scenario_term,
+                'line_of_business': scenario_lob,
+                'action': scenario_action,
+                'value': scenario_value / 100
+            }
+            # Only the new adjustment is applied, on top of the scenario's existing diff
+            scenario = scenarios.get(scenario_name, {'adjustments': [], 'diff': None})
+            diff = apply_adjustments(terms_table, [adjustment], scenario['diff'])
+            scenarios[scenario_name] = {
+                'adjustments': scenario['adjustments'] + [adjustment],
+                'diff': diff,
+                'summary': summarise_scenario(terms_table, base_summary, diff)
+            }
+        else:
+            st.warning("Please name the scenario first.")
+
+    if scenarios:
+        remove_cols = st.columns([3, 1])
+        with remove_cols[0]:
+            scenario_to_remove = st.selectbox("Scenario to Remove", list(scenarios))
+        with remove_cols[1]:
+            if st.button("Remove Scenario"):
+                del scenarios[scenario_to_remove]
+
+    if scenarios:
+        st.dataframe(
+            compare_scenarios(base_summary, scenarios).style.format({
+                'Total_Premium': '£{:,.0f}',
+                'Premium_Change': '{:+.1%}',
+                'Rate_Adequacy': '{:.1%}',
+                'Line_Exposure': '£{:,.0f}'
+            }),
+            use_container_width=True
+        )
+
 def display_policy_terms(policy):
     """
     Display detailed terms for a selected policy
@@ -183,6 +352,8 @@ def display_policy_terms(policy):
     st.text_area("Underwriter Notes", height=100, key=f"notes_{policy['Policy_Ref']}")
 
 def run_terms_view():
+    warm_up_chart_libraries()
+
     # Load terms data
     terms_data = load_terms_data()
 
@@ -212,6 +383,9 @@ def run_terms_view():
             else:
                 st.warning("Please select a bulk action first.")
 
+    # Portfolio what-if scenarios
+    display_portfolio_scenarios(terms_data)
+
     # Policy Selection
     st.subheader("By Policy Selection")
     
@@ -0,0 +1,233 @@
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime, timedelta
+import streamlit as st
+
+# Shared start-up and data loading for every page. pandas is imported inside
+# the functions that need it so importing this module stays cheap.
+
+logger = logging.getLogger(__name__)
+
+# Append-only JSONL changelog of renewal policy upserts. Each line is a full
+# policy record with a Policy_Ref, an Updated_At timestamp and optionally
+# "Deleted": true for policies leaving the renewals book.
+CHANGE_FEED_PATH = os.environ.get("RENEWALS_CHANGE_FEED", os.path.join("data", "renewals_changes.jsonl"))
+
+# When the sample renewals snapshot was taken. It is the book's watermark
+# until the change feed brings newer data.
+SAMPLE_SNAPSHOT_AT = '2025-06-02T07:30:00'
+
+# Fields every policy upsert in the change feed must carry
+POLICY_FIELDS = [
+    'Policy_Ref', 'Insured', 'Expiry_Date', 'Premium', 'Claims_Ratio', 'Rate_Change',
+    'Risk_Score', 'Priority', 'Line_of_Business', 'Broker', 'Updated_At'
+]
+NUMERIC_FIELDS = ['Premium', 'Claims_Ratio', 'Rate_Change', 'Risk_Score']
+TEXT_FIELDS = ['Policy_Ref', 'Insured', 'Priority', 'Line_of_Business', 'Broker']
+
+# Grouping used for the triage aggregates kept alongside the book, matching
+# the Triage page filters
+TRIAGE_KEYS = ['Line_of_Business', 'Broker', 'Priority']
+
+@st.cache_resource
+def warm_up_chart_libraries():
+    """
+    Import plotly once per server process in the background. Every page calls
+    this first, so whichever page a new session opens on, the first chart
+    drawn doesn't pay the plotly.express import cost.
+    """
+    def import_plotly():
+        try:
+            import plotly.express
+        except ImportError:
+            pass
+
+    warm_up = threading.Thread(target=import_plotly, daemon=True)
+    warm_up.start()
+    return warm_up
+
+def load_sample_renewals():
+    """
+    Generate sample renewals data for demonstration
+    """
+    return {
+        'Policy_Ref': ['POL001', 'POL002', 'POL003', 'POL004', 'POL005', 'POL006', 'POL007', 'POL008', 'POL009'],
+        'Insured': ['ABC Corp', 'XYZ Ltd', 'Tech Inc', 'Global Enterprises', 'Innovative Solutions', 
+                    'Energy Partners', 'Financial Services', 'Manufacturing Co', 'Retail Giant'],
+        'Expiry_Date': [
+            (datetime.now() + timedelta(days=x)).strftime('%Y-%m-%d') 
+            for x in [30, 45, 60, 20, 75, 90, 40, 55, 85]
+        ],
+        'Premium': [1000000, 2500000, 500000, 3000000, 1500000, 4000000, 2000000, 1800000, 3500000],
+        'Claims_Ratio': [0.65, 0.40, 0.85, 0.55, 0.75, 0.30, 0.60, 0.45, 0.50],
+        'Rate_Change': [0.05, 0.08, -0.02, 0.06, 0.03, 0.10, 0.04, 0.07, 0.05],
+        'Risk_Score': [85, 72, 45, 90, 60, 95, 80, 70, 88],
+        'Priority': ['High', 'Medium', 'Low', 'High', 'Medium', 'High', 'Medium', 'Low', 'High'],
+        'Line_of_Business': ['Property', 'Casualty', 'Marine', 'Energy', 'Property', 'Energy', 
+                             'Casualty', 'Marine', 'Property'],
+        'Broker': ['Aon', 'WTW', 'Marsh', 'Other', 'Aon', 'WTW', 'Marsh', 'Other', 'Aon'],
+        'Updated_At': [SAMPLE_SNAPSHOT_AT] * 9
+    }
+
+def read_change_feed(path, offset, inode=None):
+    """
+    Read the changes appended to the change feed since the given byte offset.
+    Returns the changes, the offset to resume from and the feed's inode; a
+    trailing partial line that is still being written is left for the next
+    refresh. A feed that was truncated or rotated since the last read is read
+    again from the start, and malformed lines are logged and skipped.
+    """
+    if not os.path.exists(path):
+        return [], offset, inode
+    with open(path, 'rb') as feed:
+        stat = os.fstat(feed.fileno())
+        if stat.st_size < offset or (inode is not None and stat.st_ino != inode):
+            logger.warning("Change feed %s was truncated or rotated, reading it from the start", path)
+            offset = 0
+        feed.seek(offset)
+        data = feed.read()
+
+    end = data.rfind(b'\n') + 1
+    changes = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            change = json.loads(line)
+        except ValueError:
+            logger.warning("Skipping malformed change feed line: %r", line[:200])
+            continue
+        if not isinstance(change, dict):
+            logger.warning("Skipping change feed line that is not a JSON object: %r", line[:200])
+            continue
+        changes.append(change)
+    return changes, offset + end, stat.st_ino
+
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp, converting timezone-aware ones to naive
+    local time so feed and snapshot timestamps compare
+    """
+    timestamp = datetime.fromisoformat(str(value))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp
+
+def validate_change(change):
+    """
+    Check a change record carries what it needs to be applied: deletes need
+    the policy reference and timestamp, upserts every policy field with the
+    right type. Returns the change with Expiry_Date normalised to YYYY-MM-DD
+    and the problems found, which are empty when the change is valid.
+    """
+    deleted = bool(change.get('Deleted'))
+    required = ['Policy_Ref', 'Updated_At'] if deleted else POLICY_FIELDS
+    problems = [f"missing {field}" for field in required if change.get(field) is None]
+    present = {field: change[field] for field in required if change.get(field) is not None}
+
+    for field in TEXT_FIELDS:
+        if field in present and not isinstance(present[field], str):
+            problems.append(f"non-text {field} {present[field]!r}")
+    for field in NUMERIC_FIELDS:
+        value = present.get(field)
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            problems.append(f"invalid {field} {value!r}")
+
+    change = dict(change)
+    if 'Expiry_Date' in present:
+        try:
+            change['Expiry_Date'] = datetime.fromisoformat(str(present['Expiry_Date'])).strftime('%Y-%m-%d')
+        except ValueError:
+            problems.append(f"invalid Expiry_Date {present['Expiry_Date']!r}")
+    if 'Updated_At' in present:
+        try:
+            parse_timestamp(present['Updated_At'])
+        except ValueError:
+            problems.append(f"invalid Updated_At {present['Updated_At']!r}")
+    return change, problems
+
+def triage_contributions(policies):
+    """
+    Policy count, premium and summed rate change per triage group
+    for a set of policies
+    """
+    return policies.groupby(TRIAGE_KEYS).agg(
+        Count=('Premium', 'size'),
+        Premium=('Premium', 'sum'),
+        Rate_Change=('Rate_Change', 'sum')
+    )
+
+def refresh_renewals_book(book):
+    """
+    Apply the changes since the last refresh to the book and the triage
+    aggregates, touching only the changed policies. Changes that fail
+    validation are logged and skipped.
+    Returns the number of policies added, updated or removed.
+    """
+    import pandas as pd
+
+    with book['lock']:
+        changes, book['offset'], book['feed_inode'] = read_change_feed(
+            CHANGE_FEED_PATH, book['offset'], book['feed_inode']
+        )
+        valid_changes = []
+        for change in changes:
+            change, problems = validate_change(change)
+            if problems:
+                logger.warning("Skipping change for policy %s: %s", change.get('Policy_Ref'), ", ".join(problems))
+            else:
+                valid_changes.append(change)
+        if not valid_changes:
+            return 0
+
+        # Only the latest change per policy matters
+        updates = pd.DataFrame(valid_changes).drop_duplicates('Policy_Ref', keep='last').set_index('Policy_Ref')
+        deleted = updates.get('Deleted', pd.Series(False, index=updates.index)).fillna(False).astype(bool)
+        upserts = updates.loc[~deleted].reindex(columns=POLICY_FIELDS[1:])
+
+        # Back out the old versions of the changed policies, then add the new ones
+        policies = book['policies']
+        replaced = policies[policies.index.isin(updates.index)]
+        aggregates = book['aggregates'].sub(triage_contributions(replaced), fill_value=0)
+        aggregates = aggregates.add(triage_contributions(upserts), fill_value=0)
+
+        book['policies'] = pd.concat([policies.drop(replaced.index), upserts])
+        book['aggregates'] = aggregates[aggregates['Count'] > 0]
+
+        book['watermark'] = max(book['watermark'], *map(parse_timestamp, updates['Updated_At']))
+
+        # Deletes of policies that were never in the book change nothing
+        removed = replaced.index.difference(upserts.index)
+        return len(upserts) + len(removed)
+
+def build_renewals_book(policies):
+    """
+    Renewals book for a snapshot of policies indexed by Policy_Ref, with its
+    triage aggregates and watermark, ready for refresh_renewals_book
+    """
+    return {
+        'policies': policies,
+        'aggregates': triage_contributions(policies),
+        'offset': 0,
+        'feed_inode': None,
+        'watermark': max(map(parse_timestamp, policies['Updated_At'])),
+        'lock': threading.Lock()
+    }
+
+@st.cache_resource
+def load_renewals_book():
+    """
+    Renewals book shared across sessions. It is built once from the renewals
+    snapshot plus the change feed, and afterwards kept current by
+    refresh_renewals_book.
+    """
+    import pandas as pd
+
+    book = build_renewals_book(pd.DataFrame(load_sample_renewals()).set_index('Policy_Ref'))
+    refresh_renewals_book(book)
+    return book
@@ -0,0 +1,105 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Import-time budget per page in milliseconds, covering every module the
+# page pulls in while loading (streamlit, pandas, ...) but not rendering it.
+# They leave headroom for slow CI machines: the pages load in about 500 ms
+# (Overview) and 900 ms (the rest) on a single-core runner.
+PAGE_BUDGETS_MS = {
+    "Overview.py": 900,
+    "pages/1_Prioritisation.py": 1500,
+    "pages/2_Assessment.py": 1500,
+    "pages/3_Terms.py": 1500,
+}
+
+# Loads a page as a module without running it as __main__
+LOAD_PAGE = (
+    "import importlib.util, sys; "
+    "spec = importlib.util.spec_from_file_location('page', sys.argv[1]); "
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+)
+
+def measure_import_time(page, runs=3):
+    """
+    Load a page under `python -X importtime` and return the modules it
+    imported with their cumulative times in microseconds, from the fastest run
+    """
+    fastest = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", LOAD_PAGE, str(REPO_ROOT / page)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        timings = {}
+        total = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            timings[name.strip()] = int(cumulative)
+            # Only top-level imports count towards the total, nested ones
+            # are already included in their parent's cumulative time
+            if not name.startswith("   "):
+                total += int(cumulative)
+        if fastest is None or total < fastest[0]:
+            fastest = (total, timings)
+    return fastest
+
+@pytest.mark.parametrize("page", sorted(PAGE_BUDGETS_MS))
+def test_page_import_time_within_budget(page):
+    total_us, _ = measure_import_time(page)
+    budget_ms = PAGE_BUDGETS_MS[page]
+    assert total_us / 1000 <= budget_ms, f"{page}: {total_us / 1000:.0f} ms > {budget_ms} ms budget"
+
+@pytest.mark.parametrize("page", sorted(PAGE_BUDGETS_MS))
+def test_page_does_not_import_plotly_express(page):
+    _, timings = measure_import_time(page, runs=1)
+    assert "plotly.express" not in timings
+
+# Runs the landing page, reporting the buttons already rendered and whether
+# pandas was imported at the moment the page first asks for the renewals
+# book. The plotly warm-up is disabled because its thread imports pandas too.
+LANDING_PAGE_FIRST_PAINT = """
+import sys
+import streamlit as st
+import renewals_data
+from streamlit.testing.v1 import AppTest
+
+rendered_buttons = []
+button = st.button
+def record_button(label, *args, **kwargs):
+    rendered_buttons.append(label)
+    return button(label, *args, **kwargs)
+
+load_renewals_book = renewals_data.load_renewals_book
+def record_first_paint():
+    print(rendered_buttons, 'pandas' in sys.modules)
+    return load_renewals_book()
+
+st.button = record_button
+renewals_data.warm_up_chart_libraries = lambda: None
+renewals_data.load_renewals_book = record_first_paint
+AppTest.from_file(sys.argv[1], default_timeout=60).run()
+"""
+
+def test_landing_page_paints_before_loading_the_book():
+    result = subprocess.run(
+        [sys.executable, "-c", LANDING_PAGE_FIRST_PAINT, str(REPO_ROOT / "Overview.py")],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    # The static content, ending with the navigation buttons, is already
+    # rendered and pandas is still not imported when the book is loaded
+    assert result.stdout.strip() == "['Start Triage', 'Review Assessments', 'Set Terms'] False"
@@ -0,0 +1,121 @@
+import json
+import math
+import os
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("streamlit")
+pd = pytest.importorskip("pandas")
+
+import renewals_data
+
+def sample_policy(**changes):
+    policy = {field: values[0] for field, values in renewals_data.load_sample_renewals().items()}
+    policy.update(changes)
+    return policy
+
+def write_feed(path, records, mode="a", trailing=""):
+    with open(path, mode) as feed:
+        for record in records:
+            feed.write((record if isinstance(record, str) else json.dumps(record)) + "\n")
+        feed.write(trailing)
+
+@pytest.fixture
+def feed_path(tmp_path, monkeypatch):
+    path = tmp_path / "changes.jsonl"
+    path.touch()
+    monkeypatch.setattr(renewals_data, "CHANGE_FEED_PATH", str(path))
+    return path
+
+@pytest.fixture
+def book():
+    policies = pd.DataFrame(renewals_data.load_sample_renewals()).set_index('Policy_Ref')
+    return renewals_data.build_renewals_book(policies)
+
+def assert_aggregates_match_book(book):
+    expected = renewals_data.triage_contributions(book['policies']).sort_index()
+    actual = book['aggregates'].sort_index()
+    assert list(actual.index) == list(expected.index)
+    assert (actual - expected).abs().max().max() < 1e-9
+
+def test_read_change_feed_leaves_partial_trailing_line(feed_path):
+    write_feed(feed_path, [{"Policy_Ref": "POL001"}], trailing='{"Policy_Ref": "POL0')
+    changes, offset, inode = renewals_data.read_change_feed(str(feed_path), 0)
+    assert changes == [{"Policy_Ref": "POL001"}]
+
+    write_feed(feed_path, [], trailing='02"}\n')
+    changes, offset, inode = renewals_data.read_change_feed(str(feed_path), offset, inode)
+    assert changes == [{"Policy_Ref": "POL002"}]
+    assert offset == os.path.getsize(feed_path)
+
+def test_read_change_feed_skips_malformed_lines(feed_path):
+    write_feed(feed_path, ["not json", "[1, 2]", {"Policy_Ref": "POL001"}])
+    changes, offset, _ = renewals_data.read_change_feed(str(feed_path), 0)
+    assert changes == [{"Policy_Ref": "POL001"}]
+    assert offset == os.path.getsize(feed_path)
+
+def test_read_change_feed_rereads_truncated_feed(feed_path):
+    write_feed(feed_path, [{"Policy_Ref": "POL001"}, {"Policy_Ref": "POL002"}])
+    _, offset, inode = renewals_data.read_change_feed(str(feed_path), 0)
+
+    write_feed(feed_path, [{"Policy_Ref": "POL003"}], mode="w")
+    changes, _, _ = renewals_data.read_change_feed(str(feed_path), offset, inode)
+    assert changes == [{"Policy_Ref": "POL003"}]
+
+def test_read_change_feed_rereads_rotated_feed(feed_path, tmp_path):
+    write_feed(feed_path, [{"Policy_Ref": "POL001"}])
+    _, offset, inode = renewals_data.read_change_feed(str(feed_path), 0)
+
+    rotated = tmp_path / "rotated.jsonl"
+    write_feed(rotated, [{"Policy_Ref": "POL002"}, {"Policy_Ref": "POL003"}])
+    os.replace(rotated, feed_path)
+    changes, _, _ = renewals_data.read_change_feed(str(feed_path), offset, inode)
+    assert changes == [{"Policy_Ref": "POL002"}, {"Policy_Ref": "POL003"}]
+
+def test_refresh_backs_out_replaced_policies_from_aggregates(feed_path, book):
+    write_feed(feed_path, [
+        sample_policy(Premium=2000000, Priority='Low', Updated_At='2030-01-01T09:00:00'),
+        sample_policy(Policy_Ref='POL010', Broker='Lockton', Updated_At='2030-01-01T09:05:00')
+    ])
+    assert renewals_data.refresh_renewals_book(book) == 2
+    assert book['policies'].loc['POL001', 'Premium'] == 2000000
+    assert len(book['policies']) == 10
+    assert book['watermark'] == datetime(2030, 1, 1, 9, 5)
+    assert_aggregates_match_book(book)
+
+def test_refresh_applies_upsert_then_delete_in_one_batch(feed_path, book):
+    write_feed(feed_path, [
+        sample_policy(Policy_Ref='POL010', Updated_At='2030-01-01T09:00:00'),
+        {"Policy_Ref": "POL010", "Deleted": True, "Updated_At": "2030-01-01T09:01:00"},
+        sample_policy(Policy_Ref='POL002', Premium=1, Updated_At='2030-01-01T09:02:00'),
+        {"Policy_Ref": "POL002", "Deleted": True, "Updated_At": "2030-01-01T09:03:00"},
+        {"Policy_Ref": "MISSING", "Deleted": True, "Updated_At": "2030-01-01T09:04:00"}
+    ])
+    # Only the delete of POL002, which was in the book, changes anything
+    assert renewals_data.refresh_renewals_book(book) == 1
+    assert 'POL010' not in book['policies'].index
+    assert 'POL002' not in book['policies'].index
+    assert len(book['policies']) == 8
+    assert_aggregates_match_book(book)
+
+def test_refresh_normalises_expiry_date(feed_path, book):
+    write_feed(feed_path, [sample_policy(Expiry_Date='2030-11-30T09:00:00', Updated_At='2030-01-01T09:00:00')])
+    assert renewals_data.refresh_renewals_book(book) == 1
+    assert book['policies'].loc['POL001', 'Expiry_Date'] == '2030-11-30'
+
+@pytest.mark.parametrize("changes", [
+    {"Expiry_Date": "30/11/2030"},
+    {"Premium": math.nan},
+    {"Premium": "lots"},
+    {"Premium": True},
+    {"Line_of_Business": 7},
+    {"Broker": None},
+    {"Updated_At": "yesterday"}
+])
+def test_refresh_skips_invalid_changes(feed_path, book, changes):
+    before = book['policies'].copy()
+    write_feed(feed_path, [sample_policy(**changes)])
+    assert renewals_data.refresh_renewals_book(book) == 0
+    assert book['policies'].equals(before)
+    assert_aggregates_match_book(book)